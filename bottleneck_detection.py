@@ -1,28 +1,58 @@
 from compute_metrics import DevOpsMetrics
 from statistics import mean
-from typing import List, Dict
+from typing import List, Dict, Optional
 from datetime import timedelta
 from collections import defaultdict
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 import numpy as np
 
-# Heuristic and ML-based bottleneck detection
-def detect_bottlenecks(metrics_list: List[DevOpsMetrics]) -> List[Dict]:
-    metric_fields = [
-        'lead_time', 'cycle_time', 'coding_time', 'time_to_pr',
-        'pr_review_time', 'build_time', 'deploy_lag', 'total_work_time',
-    ]
-    
-    def duration_in_seconds(metric: timedelta) -> float:
-        return metric.total_seconds()
+METRIC_FIELDS = [
+    'lead_time', 'cycle_time', 'coding_time', 'time_to_pr',
+    'pr_review_time', 'build_time', 'deploy_lag', 'total_work_time',
+]
+
+
+def duration_in_seconds(metric: timedelta) -> float:
+    return metric.total_seconds()
+
+
+# Fit the 80th percentile thresholds and the IsolationForest on a metric history
+def fit_bottleneck_detector(metrics_list: List[DevOpsMetrics]) -> Optional[Dict]:
+    if not metrics_list:
+        return None
 
-    # Step 1: Heuristic bottlenecks based on 80th percentile
     field_thresholds = {}
-    for field in metric_fields:
+    for field in METRIC_FIELDS:
         values = [duration_in_seconds(getattr(m, field)) for m in metrics_list]
         field_thresholds[field] = np.percentile(values, 80)
 
+    duration_matrix = [
+        [duration_in_seconds(getattr(m, field)) for field in METRIC_FIELDS]
+        for m in metrics_list
+    ]
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(duration_matrix)
+    model = IsolationForest(n_estimators=100, contamination=0.1, random_state=42)
+    model.fit(X_scaled)
+
+    return {'thresholds': field_thresholds, 'scaler': scaler, 'model': model}
+
+
+# Heuristic and ML-based bottleneck detection
+def detect_bottlenecks(metrics_list: List[DevOpsMetrics], detector: Optional[Dict] = None) -> List[Dict]:
+    """
+    Flags stages above the 80th percentile and IsolationForest outliers.
+    Without a detector it is fitted on metrics_list; passing a stored
+    detector scores new tasks against the history it was fitted on.
+    """
+    if not metrics_list:
+        return []
+    if detector is None:
+        detector = fit_bottleneck_detector(metrics_list)
+
+    # Step 1: Heuristic bottlenecks based on 80th percentile
+    field_thresholds = detector['thresholds']
     bottlenecks = []
     duration_matrix = []
 
@@ -30,7 +60,7 @@ def detect_bottlenecks(metrics_list: List[DevOpsMetrics]) -> List[Dict]:
         task_bottlenecks = []
         vector = []
 
-        for field in metric_fields:
+        for field in METRIC_FIELDS:
             value = duration_in_seconds(getattr(m, field))
             vector.append(value)
             if value > field_thresholds[field]:
@@ -47,10 +77,8 @@ def detect_bottlenecks(metrics_list: List[DevOpsMetrics]) -> List[Dict]:
         duration_matrix.append(vector)
 
     # Step 2: ML-based bottlenecks using IsolationForest
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(duration_matrix)
-    model = IsolationForest(n_estimators=100, contamination=0.1, random_state=42)
-    preds = model.fit_predict(X_scaled)
+    X_scaled = detector['scaler'].transform(duration_matrix)
+    preds = detector['model'].predict(X_scaled)
 
     for idx, pred in enumerate(preds):
         if pred == -1:
@@ -77,3 +105,11 @@ def aggregate_bottlenecks(bottleneck_reports: List[Dict]) -> Dict:
         'by_developer': dict(dev_stats),
         'by_stage': dict(stage_stats)
     }
+
+
+def merge_bottleneck_counts(totals: Dict, new_counts: Dict) -> Dict:
+    for group in ('by_team', 'by_developer', 'by_stage'):
+        merged = totals.setdefault(group, {})
+        for key, count in new_counts.get(group, {}).items():
+            merged[key] = merged.get(key, 0) + count
+    return totals
@@ -3,7 +3,7 @@ from datetime import datetime,timedelta
 from typing import List
 from models import DevOpsTask
 
-@dataclass
+@dataclass(slots=True)
 class DevOpsMetrics:
     ticket_id: str
     developer: str
@@ -82,6 +82,51 @@ def compute_dora_metrics(tasks: List[DevOpsTask]) -> dict:
     }
 
 
+# ----------------------------
+# Incremental DORA state
+# ----------------------------
+def new_dora_state() -> dict:
+    return {
+        "deploy_days": set(),
+        "deploy_count": 0,
+        "lead_time_hours_sum": 0.0,
+        "failed_count": 0,
+        "restore_hours_sum": 0.0,
+        "restore_count": 0
+    }
+
+
+def update_dora_state(state: dict, tasks: List[DevOpsTask]) -> dict:
+    """
+    Fold tasks into running DORA sums, in the same order compute_dora_metrics adds them.
+    """
+    for task in tasks:
+        state["deploy_days"].add(task.deployed_at.date())
+        state["deploy_count"] += 1
+        state["lead_time_hours_sum"] += (task.deployed_at - task.first_commit_at).total_seconds() / 3600
+        if not getattr(task, 'deployment_success', True):
+            state["failed_count"] += 1
+            if getattr(task, 'restore_time', None):
+                state["restore_hours_sum"] += (task.restore_time - task.deployed_at).total_seconds() / 3600
+                state["restore_count"] += 1
+    return state
+
+
+def dora_from_state(state: dict) -> dict:
+    count = state["deploy_count"]
+    if not count:
+        return {}
+
+    unique_days = len(state["deploy_days"])
+    restores = state["restore_count"]
+    return {
+        "deployment_frequency_per_day": round(count / unique_days if unique_days else 0, 2),
+        "average_lead_time_hours": round(state["lead_time_hours_sum"] / count, 2),
+        "change_failure_rate_percent": round(state["failed_count"] / count * 100, 2),
+        "mean_time_to_restore_hours": round(state["restore_hours_sum"] / restores if restores else 0, 2)
+    }
+
+
 if __name__ == "__main__":
     from generate_data import generate_synthetic_tasks
 
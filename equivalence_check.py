@@ -0,0 +1,414 @@
+import math
+import random
+import sys
+from contextlib import closing
+from dataclasses import replace
+from datetime import timedelta
+from typing import Callable, Dict, List, Tuple
+import numpy as np
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+from models import DevOpsTask
+from generate_data import generate_synthetic_tasks
+from compute_metrics import (
+    compute_all_metrics,
+    compute_dora_metrics,
+    new_dora_state,
+    update_dora_state,
+    dora_from_state
+)
+from bottleneck_detection import (
+    METRIC_FIELDS,
+    aggregate_bottlenecks,
+    detect_bottlenecks,
+    fit_bottleneck_detector,
+    merge_bottleneck_counts
+)
+from recommendation_engine import (
+    expand_recommendations,
+    generate_compact_recommendations,
+    generate_task_recommendations,
+    summarize_recommendations
+)
+from trend_analysis import analyze_trends, trends_from_state, update_trend_state
+import warehouse
+
+# Differential harness: every fast engine must reproduce its reference implementation
+
+BATCHES = 3
+
+
+def _batches(items: list, n: int = BATCHES) -> List[list]:
+    size = max(1, math.ceil(len(items) / n))
+    return [items[i:i + size] for i in range(0, len(items), size)] or [[]]
+
+
+def _stored(tasks: List[DevOpsTask]):
+    conn = warehouse.connect(":memory:")
+    metrics = compute_all_metrics(tasks)
+    warehouse.store_tasks(conn, tasks)
+    warehouse.store_metrics(conn, metrics)
+    return conn, metrics
+
+
+# ----------------------------
+# Engines (each takes the raw task list)
+# ----------------------------
+def _dora_incremental(tasks):
+    state = new_dora_state()
+    for batch in _batches(tasks):
+        update_dora_state(state, batch)
+    return dora_from_state(state)
+
+
+def _dora_sqlite(tasks):
+    conn, _ = _stored(tasks)
+    with closing(conn):
+        return warehouse.query_dora_metrics(conn)
+
+
+def _durations(metrics: list) -> np.ndarray:
+    return np.array([[getattr(m, f).total_seconds() for f in METRIC_FIELDS] for m in metrics])
+
+
+def _bottleneck_report(m, row: np.ndarray, thresholds: np.ndarray, pred: int) -> Dict:
+    stages = [f for f, value, limit in zip(METRIC_FIELDS, row, thresholds) if value > limit]
+    ml_flag = bool(pred == -1)
+    return {
+        'ticket_id': m.ticket_id,
+        'developer': m.developer,
+        'team': m.team,
+        'bottlenecks': stages or (['ml_detected'] if ml_flag else []),
+        'heuristic': bool(stages),
+        'ml_flag': ml_flag
+    }
+
+
+def _bottlenecks_reference(tasks):
+    """
+    Spelled-out single-pass detection: 80th percentiles and an
+    IsolationForest fitted and applied on the same metrics.
+    """
+    metrics = compute_all_metrics(tasks)
+    if not metrics:
+        return []
+
+    rows = _durations(metrics)
+    thresholds = np.percentile(rows, 80, axis=0)
+    model = IsolationForest(n_estimators=100, contamination=0.1, random_state=42)
+    preds = model.fit_predict(StandardScaler().fit_transform(rows))
+    return [
+        _bottleneck_report(m, row, thresholds, pred)
+        for m, row, pred in zip(metrics, rows, preds)
+    ]
+
+
+def _bottlenecks_single_pass(tasks):
+    return detect_bottlenecks(compute_all_metrics(tasks))
+
+
+def _bottlenecks_stored_detector(tasks):
+    metrics = compute_all_metrics(tasks)
+    detector = fit_bottleneck_detector(metrics)
+    return [b for batch in _batches(metrics) for b in detect_bottlenecks(batch, detector)]
+
+
+def _split_history(metrics: list) -> Tuple[list, list]:
+    # Earlier two thirds act as stored history, the rest as newly ingested tasks
+    cut = max(1, len(metrics) * 2 // 3)
+    return metrics[:cut], metrics[cut:]
+
+
+def _new_tasks_reference(tasks):
+    """
+    Spelled-out version of scoring new tasks against history: per-field 80th
+    percentiles and an IsolationForest fitted on the history only.
+    """
+    history, new = _split_history(compute_all_metrics(tasks))
+    if not new:
+        return []
+
+    past = _durations(history)
+    thresholds = np.percentile(past, 80, axis=0)
+    scaler = StandardScaler().fit(past)
+    model = IsolationForest(n_estimators=100, contamination=0.1, random_state=42)
+    model.fit(scaler.transform(past))
+
+    rows = _durations(new)
+    preds = model.predict(scaler.transform(rows))
+    return [
+        _bottleneck_report(m, row, thresholds, pred)
+        for m, row, pred in zip(new, rows, preds)
+    ]
+
+
+def _new_tasks_stored_detector(tasks):
+    # What run_incremental does: fit on history, score each new batch (possibly empty)
+    history, new = _split_history(compute_all_metrics(tasks))
+    detector = fit_bottleneck_detector(history)
+    return [b for batch in _batches(new) for b in detect_bottlenecks(batch, detector)]
+
+
+def _aggregate_reference(tasks):
+    return aggregate_bottlenecks(_bottlenecks_reference(tasks))
+
+
+def _aggregate_merged(tasks):
+    totals = {'by_team': {}, 'by_developer': {}, 'by_stage': {}}
+    for batch in _batches(_bottlenecks_reference(tasks)):
+        merge_bottleneck_counts(totals, aggregate_bottlenecks(batch))
+    return totals
+
+
+def _aggregate_sqlite(tasks):
+    conn, _ = _stored(tasks)
+    with closing(conn):
+        warehouse.store_bottlenecks(conn, _bottlenecks_reference(tasks))
+        return warehouse.query_bottleneck_counts(conn)
+
+
+def _trends_reference(tasks):
+    return analyze_trends(compute_all_metrics(tasks))
+
+
+def _trends_incremental(tasks):
+    state = {}
+    for batch in _batches(compute_all_metrics(tasks)):
+        update_trend_state(state, batch)
+    return trends_from_state(state)
+
+
+def _task_rules_reference(m) -> List[Tuple[str, Dict]]:
+    # The original per-task if-chain, with literal thresholds and messages
+    recs = []
+
+    if m.pr_review_time.total_seconds() > 36 * 3600:
+        recs.append(("slow_pr_review", {
+            "category": "Code Review",
+            "severity": "High",
+            "message": "PR reviews are slow. Encourage smaller PRs, rotate reviewers, or enforce SLAs."
+        }))
+
+    if m.lead_time.total_seconds() > 5 * 86400:
+        recs.append(("high_lead_time", {
+            "category": "Process",
+            "severity": "High",
+            "message": "Lead time is too high. Reassess delays across planning to delivery."
+        }))
+
+    if m.deploy_lag.total_seconds() > 2 * 3600:
+        recs.append(("deploy_lag", {
+            "category": "Deployment",
+            "severity": "Medium",
+            "message": "Deployments are delayed post-merge. Consider continuous delivery triggers."
+        }))
+
+    if m.build_time.total_seconds() > 1800:
+        recs.append(("slow_build", {
+            "category": "CI/CD",
+            "severity": "Medium",
+            "message": "Builds are slow. Optimize pipelines, cache dependencies, or parallelize tests."
+        }))
+
+    if m.cycle_time.total_seconds() > 4 * 86400:
+        recs.append(("high_cycle_time", {
+            "category": "Development",
+            "severity": "High",
+            "message": "Cycle time is high. Investigate blockers during development or QA delays."
+        }))
+
+    return recs
+
+
+def _recs_reference(tasks):
+    all_recs = []
+    for m in compute_all_metrics(tasks):
+        task_recs = _task_rules_reference(m)
+        if task_recs:
+            all_recs.append({
+                "ticket_id": m.ticket_id,
+                "developer": m.developer,
+                "team": m.team,
+                "recommendations": [rec for _, rec in task_recs]
+            })
+    return all_recs
+
+
+def _recs_per_task(tasks):
+    recs = []
+    for m in compute_all_metrics(tasks):
+        task_recs = generate_task_recommendations(m)
+        if task_recs:
+            recs.append({
+                "ticket_id": m.ticket_id,
+                "developer": m.developer,
+                "team": m.team,
+                "recommendations": task_recs
+            })
+    return recs
+
+
+def _recs_compact(tasks):
+    return expand_recommendations(generate_compact_recommendations(compute_all_metrics(tasks)))
+
+
+def _rule_counts_reference(tasks):
+    counts = {}
+    for m in compute_all_metrics(tasks):
+        for rule_id, _ in _task_rules_reference(m):
+            by_team = counts.setdefault(rule_id, {})
+            by_team[m.team] = by_team.get(m.team, 0) + 1
+    return counts
+
+
+def _rule_counts_compact(tasks):
+    return summarize_recommendations(generate_compact_recommendations(compute_all_metrics(tasks)))
+
+
+# function -> (reference, {engine name: engine}, absolute tolerance)
+# DORA and trend figures are rounded to 2 decimals, so one rounding step is tolerated.
+CHECKS: Dict[str, Tuple[Callable, Dict[str, Callable], float]] = {
+    "compute_dora_metrics": (compute_dora_metrics, {
+        "incremental_state": _dora_incremental,
+        "sqlite": _dora_sqlite,
+    }, 0.01),
+    "detect_bottlenecks": (_bottlenecks_reference, {
+        "single_pass": _bottlenecks_single_pass,
+        "stored_detector": _bottlenecks_stored_detector,
+    }, 1e-9),
+    "detect_bottlenecks_new_tasks": (_new_tasks_reference, {
+        "stored_detector": _new_tasks_stored_detector,
+    }, 1e-9),
+    "aggregate_bottlenecks": (_aggregate_reference, {
+        "merged_batches": _aggregate_merged,
+        "sqlite": _aggregate_sqlite,
+    }, 0),
+    "analyze_trends": (_trends_reference, {
+        "incremental_state": _trends_incremental,
+    }, 0.01),
+    "generate_all_recommendations": (_recs_reference, {
+        "per_task": _recs_per_task,
+        "rule_catalog": _recs_compact,
+    }, 0),
+    "summarize_recommendations": (_rule_counts_reference, {
+        "rule_catalog": _rule_counts_compact,
+    }, 0),
+}
+
+
+# ----------------------------
+# Corpora
+# ----------------------------
+def seeded_tasks(seed: int, num_tasks: int) -> List[DevOpsTask]:
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        return generate_synthetic_tasks(num_tasks)
+    finally:
+        random.setstate(state)
+
+
+def build_corpora(seeds=(0, 1, 2), sizes=(50, 500)) -> Dict[str, List[DevOpsTask]]:
+    corpora = {
+        f"seed{seed}_n{size}": seeded_tasks(seed, size)
+        for seed in seeds for size in sizes
+    }
+    base = seeded_tasks(seeds[0], sizes[0])
+    corpora["empty"] = []
+    corpora["single_task"] = base[:1]
+    corpora["single_sprint"] = [replace(t, sprint=0) for t in base]
+    corpora["all_failures"] = [
+        replace(t, deployment_success=False, restore_time=t.deployed_at + timedelta(hours=1))
+        for t in base
+    ]
+    corpora["missing_restore_time"] = [
+        replace(t, deployment_success=False, restore_time=None) for t in base
+    ]
+    return corpora
+
+
+# ----------------------------
+# Comparison
+# ----------------------------
+def _outcome(fn: Callable, tasks: List[DevOpsTask]):
+    try:
+        return fn(tasks), ""
+    except Exception as exc:
+        return None, f"raised {type(exc).__name__}: {exc}"
+
+
+def find_difference(expected, actual, tol: float, path: str = "") -> str:
+    """
+    Returns a description of the first mismatch, or "" when equivalent.
+    Numbers are compared within tol; everything else exactly.
+    """
+    if isinstance(expected, bool) or isinstance(actual, bool):
+        return "" if expected == actual else f"{path}: {expected!r} != {actual!r}"
+    if isinstance(expected, (int, float)) and isinstance(actual, (int, float)):
+        if math.isclose(expected, actual, rel_tol=1e-9, abs_tol=tol + 1e-12):
+            return ""
+        return f"{path}: {expected!r} != {actual!r} (tol {tol})"
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        if expected.keys() != actual.keys():
+            return f"{path}: keys {sorted(map(str, expected))} != {sorted(map(str, actual))}"
+        for key in expected:
+            diff = find_difference(expected[key], actual[key], tol, f"{path}[{key!r}]")
+            if diff:
+                return diff
+        return ""
+    if isinstance(expected, (list, tuple)) and isinstance(actual, (list, tuple)):
+        if len(expected) != len(actual):
+            return f"{path}: length {len(expected)} != {len(actual)}"
+        for i, (e, a) in enumerate(zip(expected, actual)):
+            diff = find_difference(e, a, tol, f"{path}[{i}]")
+            if diff:
+                return diff
+        return ""
+    return "" if expected == actual else f"{path}: {expected!r} != {actual!r}"
+
+
+def run_equivalence_checks(corpora: Dict[str, List[DevOpsTask]] = None) -> List[Dict]:
+    """
+    Compare every engine with its reference on every corpus. An exception on
+    either side is a failure, never a match.
+    """
+    corpora = build_corpora() if corpora is None else corpora
+    results = []
+
+    for function, (reference, engines, tol) in CHECKS.items():
+        for corpus_name, tasks in corpora.items():
+            expected, reference_error = _outcome(reference, tasks)
+            for engine_name, engine in engines.items():
+                actual, engine_error = _outcome(engine, tasks)
+                if reference_error or engine_error:
+                    diff = f"reference {reference_error or 'ok'}, engine {engine_error or 'ok'}"
+                else:
+                    diff = find_difference(expected, actual, tol)
+                results.append({
+                    "function": function,
+                    "engine": engine_name,
+                    "corpus": corpus_name,
+                    "ok": not diff,
+                    "detail": diff
+                })
+
+    return results
+
+
+def assert_equivalent(corpora: Dict[str, List[DevOpsTask]] = None) -> None:
+    failures = [r for r in run_equivalence_checks(corpora) if not r["ok"]]
+    if failures:
+        lines = [f"{f['function']} / {f['engine']} / {f['corpus']}: {f['detail']}" for f in failures]
+        raise AssertionError("Engines diverge from reference:\n" + "\n".join(lines))
+
+
+if __name__ == "__main__":
+    results = run_equivalence_checks()
+    failures = [r for r in results if not r["ok"]]
+
+    print(f"🧪 {len(results)} engine/corpus comparisons")
+    for r in failures:
+        print(f"[FAIL] {r['function']} / {r['engine']} / {r['corpus']}: {r['detail']}")
+    if failures:
+        sys.exit(1)
+    print("✅ All fast engines match their reference implementations.")
@@ -1,23 +1,27 @@
 import csv
 import json
-from typing import List, Dict
+import os
+import textwrap
+from typing import List, Dict, Union
 from compute_metrics import DevOpsMetrics
 
-def export_metrics_to_csv(metrics: List[DevOpsMetrics], filename: str = "metrics.csv") -> None:
+def export_metrics_to_csv(metrics: List[DevOpsMetrics], filename: str = "metrics.csv", append: bool = False) -> None:
     if not metrics:
         print(f"[WARN] No metrics to export to {filename}")
         return
 
-    with open(filename, mode="w", newline="") as f:
+    append = append and os.path.exists(filename)
+    with open(filename, mode="a" if append else "w", newline="") as f:
         writer = csv.writer(f)
-        writer.writerow(metrics[0].__dataclass_fields__.keys())
+        if not append:
+            writer.writerow(metrics[0].__dataclass_fields__.keys())
         for m in metrics:
             writer.writerow([getattr(m, field) for field in metrics[0].__dataclass_fields__])
 
-    print(f"[EXPORT] Metrics exported to {filename}")
+    print(f"[EXPORT] Metrics {'appended' if append else 'exported'} to {filename}")
 
 
-def export_json(data: List[dict], filename: str) -> None:
+def export_json(data: Union[List[dict], Dict], filename: str) -> None:
     if not data:
         print(f"[WARN] No data to export to {filename}")
         return
@@ -28,6 +32,51 @@ def export_json(data: List[dict], filename: str) -> None:
     print(f"[EXPORT] JSON data exported to {filename}")
 
 
+def append_json(items: List[dict], filename: str, depth: int = 1) -> None:
+    """
+    Append items to the last JSON array in a file written by export_json,
+    without re-reading the existing entries. depth is the nesting level
+    of that array (1 for a top-level list, 2 for a list under a key).
+    """
+    if not items:
+        return
+
+    if not os.path.exists(filename):
+        if depth == 1:
+            export_json(items, filename)
+        else:
+            print(f"[WARN] {filename} does not exist, nothing to patch")
+        return
+
+    with open(filename, "rb+") as f:
+        # Walk back from the end to the closing bracket of the array
+        f.seek(0, os.SEEK_END)
+        start = f.tell()
+        chunk = b""
+        while start > 0 and b"]" not in chunk:
+            start = max(0, start - 4096)
+            f.seek(start)
+            chunk = f.read()
+        close = start + chunk.rindex(b"]")
+
+        # Re-read a window before the bracket to find where the last entry ends
+        window_start = max(0, close - 4096)
+        f.seek(window_start)
+        head = f.read(close - window_start).rstrip()
+        suffix = f.read()
+        separator = "" if head.endswith(b"[") else ","
+
+        body = ",\n".join(
+            textwrap.indent(json.dumps(item, indent=2, default=str), "  " * depth)
+            for item in items
+        )
+        f.seek(window_start + len(head))
+        f.write(f"{separator}\n{body}\n{'  ' * (depth - 1)}".encode() + suffix)
+        f.truncate()
+
+    print(f"[EXPORT] {len(items)} entries appended to {filename}")
+
+
 def export_dora_metrics(dora_metrics: Dict[str, float], filename: str = "dora_metrics.json") -> None:
     with open(filename, "w") as f:
         json.dump(dora_metrics, f, indent=2)
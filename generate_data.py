@@ -1,7 +1,10 @@
+import os
 import random
+from dataclasses import fields
 from datetime import datetime, timedelta
-from typing import List
+from typing import List, Optional, Set, Tuple, get_args
 from models import DevOpsTask  
+from identifiers import IDENTIFIERS, IdentifierPool
 import csv
 
 def generate_synthetic_tasks(num_tasks: int = 100) -> List[DevOpsTask]:
@@ -63,6 +66,81 @@ def export_to_csv(tasks: List[DevOpsTask], filename: str = "synthetic_tasks.csv"
             writer.writerow([getattr(task, field) for field in task.__dataclass_fields__])
 
 
+def _parse_csv_value(value: str, field_type):
+    if value == "":
+        return None
+    base = next((t for t in get_args(field_type) if t is not type(None)), field_type)
+    if base is datetime:
+        return datetime.fromisoformat(value)
+    if base is bool:
+        return value == "True"
+    if base is int:
+        return int(value)
+    return value
+
+
+def _task_from_row(header: List[str], row: List[str], types: dict, pool: Optional[IdentifierPool]) -> DevOpsTask:
+    values = {name: _parse_csv_value(value, types[name]) for name, value in zip(header, row)}
+    if pool is not None:
+        values["developer"] = pool.intern(values["developer"])
+        values["team"] = pool.intern(values["team"])
+    return DevOpsTask(**values)
+
+
+def load_tasks_from_csv(filename: str, pool: Optional[IdentifierPool] = IDENTIFIERS) -> List[DevOpsTask]:
+    """
+    Read tasks written by export_to_csv (or any CSV with the same header).
+    Developer and team names go through pool so rows share one string per value.
+    """
+    types = {f.name: f.type for f in fields(DevOpsTask)}
+    with open(filename, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        return [_task_from_row(header, row, types, pool) for row in reader]
+
+
+def load_new_tasks_from_csv(
+    filename: str,
+    offset: int = 0,
+    watermark: Optional[datetime] = None,
+    watermark_ids: Set[str] = frozenset(),
+    pool: Optional[IdentifierPool] = IDENTIFIERS
+) -> Tuple[List[DevOpsTask], int]:
+    """
+    Read only the rows appended after byte offset, keeping those deployed after
+    the watermark (or at it, with a ticket id not in watermark_ids). Skipped
+    rows never become DevOpsTask objects. Returns the tasks and the offset to
+    resume from; a trailing partial line is left for the next call. An offset
+    past the end of the file (the file was rewritten) reads it from the start.
+    """
+    types = {f.name: f.type for f in fields(DevOpsTask)}
+    with open(filename, "rb") as f:
+        header_line = f.readline()
+        header = next(csv.reader([header_line.decode()]), [])
+        f.seek(0, os.SEEK_END)
+        if not offset or offset > f.tell():
+            offset = len(header_line)
+        f.seek(offset)
+        data = f.read()
+
+    # Only complete lines are consumed
+    data = data[:data.rfind(b"\n") + 1]
+    deployed_idx = header.index("deployed_at") if header else 0
+    ticket_idx = header.index("ticket_id") if header else 0
+
+    tasks = []
+    for row in csv.reader(data.decode().splitlines()):
+        if not row:
+            continue
+        if watermark is not None:
+            deployed_at = datetime.fromisoformat(row[deployed_idx])
+            if deployed_at < watermark or (deployed_at == watermark and row[ticket_idx] in watermark_ids):
+                continue
+        tasks.append(_task_from_row(header, row, types, pool))
+
+    return tasks, offset + len(data)
+
+
 if __name__ == "__main__":
     from pprint import pprint
 
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import tracemalloc
+from dataclasses import fields, make_dataclass
+from typing import Dict, Optional
+
+# Shared pool for developer / team names
+class IdentifierPool:
+    """
+    Deduplicates low-cardinality identifiers (developers, teams) so tasks
+    and metrics loaded row by row (CSV, SQLite) share one string per value.
+    Objects built in memory already share their strings and skip the pool.
+    """
+
+    def __init__(self):
+        self._values: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def intern(self, value: Optional[str]) -> Optional[str]:
+        if value is None:
+            return None
+        pooled = self._values.get(value)
+        if pooled is None:
+            pooled = self._values[value] = value
+        return pooled
+
+    def clear(self) -> None:
+        # Existing objects keep their strings; only the lookup table is dropped
+        self._values.clear()
+
+
+IDENTIFIERS = IdentifierPool()
+
+
+def estimate_memory_savings(sample_size: int = 100_000) -> Dict[str, float]:
+    """
+    Compare dict-backed copies of the pipeline's tasks and metrics with the
+    slotted DevOpsTask / DevOpsMetrics built from the same field values, and
+    tasks loaded from CSV with and without the identifier pool.
+    Results are scaled to MB per million tasks.
+    """
+    from generate_data import export_to_csv, generate_synthetic_tasks, load_tasks_from_csv
+    from compute_metrics import DevOpsMetrics, compute_all_metrics
+    from models import DevOpsTask
+
+    tasks = generate_synthetic_tasks(sample_size)
+    metrics = compute_all_metrics(tasks)
+
+    def traced(build) -> int:
+        tracemalloc.start()
+        built = build()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del built
+        return size
+
+    def measure(cls, items) -> int:
+        names = [f.name for f in fields(cls)]
+        return traced(lambda: [cls(**{name: getattr(item, name) for name in names}) for item in items])
+
+    def legacy(cls):
+        return make_dataclass(f"Legacy{cls.__name__}", [(f.name, f.type, f) for f in fields(cls)])
+
+    scale = 1_000_000 / sample_size / 2**20
+    report = {}
+    for label, cls, items in (("tasks", DevOpsTask, tasks), ("metrics", DevOpsMetrics, metrics)):
+        dict_backed = measure(legacy(cls), items)
+        slotted = measure(cls, items)
+        report[f"{label}_dict_mb_per_million"] = round(dict_backed * scale, 2)
+        report[f"{label}_slots_mb_per_million"] = round(slotted * scale, 2)
+        report[f"{label}_saved_mb_per_million"] = round((dict_backed - slotted) * scale, 2)
+
+    # Every CSV row parses into fresh developer / team strings unless pooled
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    try:
+        export_to_csv(tasks, path)
+        unpooled = traced(lambda: load_tasks_from_csv(path, pool=None))
+        pooled = traced(lambda: load_tasks_from_csv(path, pool=IdentifierPool()))
+    finally:
+        os.remove(path)
+    report["csv_tasks_unpooled_mb_per_million"] = round(unpooled * scale, 2)
+    report["csv_tasks_pooled_mb_per_million"] = round(pooled * scale, 2)
+    report["csv_identifiers_saved_mb_per_million"] = round((unpooled - pooled) * scale, 2)
+    return report
+
+
+if __name__ == "__main__":
+    print("🧮 Object storage per million tasks:")
+    for k, v in estimate_memory_savings().items():
+        print(f"{k}: {v}")
@@ -0,0 +1,93 @@
+import os
+import pickle
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+from models import DevOpsTask
+from compute_metrics import DevOpsMetrics, new_dora_state, update_dora_state
+from bottleneck_detection import aggregate_bottlenecks, merge_bottleneck_counts
+from recommendation_engine import summarize_recommendations
+from trend_analysis import update_trend_state
+
+STATE_FILE = "run_state.pkl"
+
+
+# Everything an incremental run needs from previous runs
+@dataclass
+class PipelineState:
+    watermark: Optional[datetime] = None            # Latest deployed_at ingested
+    watermark_ids: Set[str] = field(default_factory=set)  # Tickets deployed exactly at the watermark
+    task_count: int = 0
+    dora: Dict = field(default_factory=new_dora_state)
+    trends: Dict = field(default_factory=dict)
+    bottleneck_detector: Optional[Dict] = None
+    bottleneck_counts: Dict = field(default_factory=dict)
+    anomaly_model: Optional[object] = None
+    recommendation_counts: Dict = field(default_factory=dict)
+    source_path: Optional[str] = None               # CSV the tasks are read from
+    source_offset: int = 0                          # Bytes of source_path already read
+
+
+def load_state(path: str) -> Optional[PipelineState]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def save_state(state: PipelineState, path: str) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def select_new_tasks(tasks: List[DevOpsTask], state: PipelineState) -> List[DevOpsTask]:
+    """
+    Keep tasks deployed after the watermark, plus any tasks sharing the
+    watermark timestamp that have not been ingested yet.
+    """
+    if state.watermark is None:
+        return list(tasks)
+    return [
+        t for t in tasks
+        if t.deployed_at > state.watermark
+        or (t.deployed_at == state.watermark and t.ticket_id not in state.watermark_ids)
+    ]
+
+
+def _merge_rule_counts(totals: Dict, new_counts: Dict) -> Dict:
+    for rule_id, groups in new_counts.items():
+        merged = totals.setdefault(rule_id, {})
+        for key, count in groups.items():
+            merged[key] = merged.get(key, 0) + count
+    return totals
+
+
+def update_state(
+    state: PipelineState,
+    tasks: List[DevOpsTask],
+    metrics: List[DevOpsMetrics],
+    bottlenecks: List[Dict],
+    task_recs: Dict
+) -> PipelineState:
+    """
+    Fold a batch of newly ingested tasks and their results into the state.
+    Cost is proportional to the batch, not to the history.
+    """
+    if not tasks:
+        return state
+
+    state.task_count += len(tasks)
+    update_dora_state(state.dora, tasks)
+    update_trend_state(state.trends, metrics)
+    merge_bottleneck_counts(state.bottleneck_counts, aggregate_bottlenecks(bottlenecks))
+    _merge_rule_counts(state.recommendation_counts, summarize_recommendations(task_recs, group_by="team"))
+
+    latest = max(t.deployed_at for t in tasks)
+    if state.watermark is None or latest > state.watermark:
+        state.watermark = latest
+        state.watermark_ids = set()
+    state.watermark_ids.update(t.ticket_id for t in tasks if t.deployed_at == state.watermark)
+
+    return state
@@ -1,11 +1,28 @@
+import argparse
 import os
-from generate_data import generate_synthetic_tasks
-from compute_metrics import compute_all_metrics, compute_dora_metrics
-from bottleneck_detection import detect_bottlenecks
-from recommendation_engine import generate_all_recommendations, generate_dora_insights
-from export import export_metrics_to_csv, export_json
-from trend_analysis import analyze_trends
-from ml_anomaly_detector import detect_anomalies
+from contextlib import closing
+from typing import List, Optional
+from models import DevOpsTask
+from generate_data import generate_synthetic_tasks, load_new_tasks_from_csv
+from compute_metrics import compute_all_metrics, compute_dora_metrics, dora_from_state
+from bottleneck_detection import detect_bottlenecks, fit_bottleneck_detector
+from recommendation_engine import (
+    generate_compact_recommendations,
+    generate_dora_insights,
+    generate_dora_recommendations
+)
+from export import export_metrics_to_csv, export_json, append_json
+from trend_analysis import analyze_trends, trends_from_state
+from ml_anomaly_detector import detect_anomalies, fit_anomaly_model
+from incremental import (
+    STATE_FILE,
+    PipelineState,
+    load_state,
+    save_state,
+    select_new_tasks,
+    update_state
+)
+from warehouse import connect, store_run
 from visualize import (
     plot_stage_distribution,
     plot_bottleneck_counts,
@@ -20,21 +37,85 @@ from visualize import (
 OUTPUT_DIR = "outputs"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-def run():
-    print("🔧 Generating synthetic data...")
-    tasks = generate_synthetic_tasks(100)
+
+def write_task_recommendation_lines(f, task_recs: List[dict]) -> None:
+    for rec in task_recs:
+        f.write(f"{rec['ticket_id']} ({rec['developer']}/{rec['team']}): {', '.join(rec['rules'])}\n")
+
+
+def export_summaries(
+    state: PipelineState,
+    dora_metrics: dict,
+    dora_recs: List[dict],
+    trends: List[dict],
+    output_dir: str = OUTPUT_DIR
+) -> None:
+    # Small outputs derived from history-wide state; rewritten on every run
+    export_json(state.bottleneck_counts, os.path.join(output_dir, "bottleneck_summary.json"))
+    export_json(state.recommendation_counts, os.path.join(output_dir, "task_recommendation_summary.json"))
+    export_json(dora_recs, os.path.join(output_dir, "dora_recommendations.json"))
+    export_json(trends, os.path.join(output_dir, "trend_regressions.json"))
+
+    with open(os.path.join(output_dir, "dora_recommendations.txt"), "w") as f:
+        for rec in dora_recs:
+            f.write(f"{rec}\n")
+
+    # Export DORA metrics
+    with open(os.path.join(output_dir, "dora_metrics.txt"), "w") as f:
+        for k, v in dora_metrics.items():
+            f.write(f"{k}: {v}\n")
+
+
+def run(
+    tasks: Optional[List[DevOpsTask]] = None,
+    incremental: bool = False,
+    warehouse_path: Optional[str] = None,
+    output_dir: str = OUTPUT_DIR,
+    show_plots: bool = True,
+    tasks_csv: Optional[str] = None
+):
+    os.makedirs(output_dir, exist_ok=True)
+    state_path = os.path.join(output_dir, STATE_FILE)
+    state = load_state(state_path) if incremental else None
+
+    source_path, source_offset = None, 0
+    if tasks is None and tasks_csv:
+        source_path = os.path.abspath(tasks_csv)
+        offset, watermark, watermark_ids = 0, None, frozenset()
+        if state is not None:
+            # Rows at or before the watermark are skipped before any task is built,
+            # and rows earlier runs read from the same file are not read again
+            watermark, watermark_ids = state.watermark, state.watermark_ids
+            if state.source_path == source_path:
+                offset = state.source_offset
+        print(f"📂 Reading tasks from {tasks_csv}...")
+        tasks, source_offset = load_new_tasks_from_csv(source_path, offset, watermark, watermark_ids)
+    elif tasks is None:
+        print("🔧 Generating synthetic data...")
+        tasks = generate_synthetic_tasks(100)
+
+    if state is not None:
+        if source_path:
+            state.source_path, state.source_offset = source_path, source_offset
+        run_incremental(tasks, state, state_path, warehouse_path, output_dir)
+        return
+    if incremental:
+        print("[INFO] No saved state found, running a full analysis first.")
+    if not tasks:
+        print("[INFO] No tasks to analyze.")
+        return
 
     print("📊 Computing metrics...")
     metrics = compute_all_metrics(tasks)
 
     print("🔍 Detecting bottlenecks...")
-    bottlenecks = detect_bottlenecks(metrics)
+    detector = fit_bottleneck_detector(metrics)
+    bottlenecks = detect_bottlenecks(metrics, detector)
 
     print("💡 Generating task-based recommendations...")
     task_ids_with_bottlenecks = {b["ticket_id"] for b in bottlenecks}
     filtered_metrics = [m for m in metrics if m.ticket_id in task_ids_with_bottlenecks]
-    task_recs = generate_all_recommendations(filtered_metrics)
-
+    task_recs = generate_compact_recommendations(filtered_metrics)
 
     print("📈 Computing DORA metrics...")
     dora_metrics = compute_dora_metrics(tasks)
@@ -46,66 +127,149 @@ def run():
     trends = analyze_trends(metrics)
 
     print("🤖 Running anomaly detection...")
-    anomalies = detect_anomalies(metrics)
+    anomaly_model = fit_anomaly_model(metrics)
+    anomalies = detect_anomalies(metrics, anomaly_model)
+
+    state = PipelineState(
+        bottleneck_detector=detector,
+        anomaly_model=anomaly_model,
+        source_path=source_path,
+        source_offset=source_offset
+    )
+    update_state(state, tasks, metrics, bottlenecks, task_recs)
 
     print("📤 Exporting outputs...")
-    export_metrics_to_csv(metrics, os.path.join(OUTPUT_DIR, "metrics.csv"))
-    export_json(bottlenecks, os.path.join(OUTPUT_DIR, "bottlenecks.json"))
-    export_json(task_recs, os.path.join(OUTPUT_DIR, "task_recommendations.json"))
-    export_json(dora_recs, os.path.join(OUTPUT_DIR, "dora_recommendations.json"))
-    export_json(trends, os.path.join(OUTPUT_DIR, "trend_regressions.json"))
-    export_json(anomalies, os.path.join(OUTPUT_DIR, "anomalies.json"))
+    export_metrics_to_csv(metrics, os.path.join(output_dir, "metrics.csv"))
+    export_json(bottlenecks, os.path.join(output_dir, "bottlenecks.json"))
+    export_json(task_recs, os.path.join(output_dir, "task_recommendations.json"))
+    export_json(anomalies, os.path.join(output_dir, "anomalies.json"))
+    export_summaries(state, dora_metrics, dora_recs, trends, output_dir)
 
     # Export recommendations as readable text
-    with open(os.path.join(OUTPUT_DIR, "task_recommendations.txt"), "w") as f:
-        for rec in task_recs:
-            f.write(f"{rec}\n")
+    with open(os.path.join(output_dir, "task_recommendations.txt"), "w") as f:
+        for rule_id, rule in task_recs["rules"].items():
+            f.write(f"[{rule_id}] {rule['category']} ({rule['severity']}): {rule['message']}\n")
+        f.write("\n")
+        write_task_recommendation_lines(f, task_recs["tasks"])
 
-    with open(os.path.join(OUTPUT_DIR, "dora_recommendations.txt"), "w") as f:
-        for rec in dora_recs:
-            f.write(f"{rec}\n")
+    if warehouse_path:
+        print(f"🗄️ Storing run in {warehouse_path}...")
+        with closing(connect(warehouse_path)) as conn:
+            store_run(conn, tasks, metrics, bottlenecks, anomalies, dora_metrics, full=True)
 
-    # Export DORA metrics
-    with open(os.path.join(OUTPUT_DIR, "dora_metrics.txt"), "w") as f:
-        for k, v in dora_metrics.items():
-            f.write(f"{k}: {v}\n")
+    save_state(state, state_path)
 
     print("📊 Plotting insights...")
-    plot_stage_distribution(metrics, "pr_review_time")
-    plot_bottleneck_counts(bottlenecks)
-    plot_dora_metrics(dora_metrics)
-    plot_bottlenecks_by_stage_and_team(bottlenecks)
-    plot_avg_stage_durations(metrics)   
-    plot_dora_trends_over_sprints(metrics)
-    plot_developer_stage_heatmap(bottlenecks)
+    if show_plots:
+        plot_stage_distribution(metrics, "pr_review_time")
+        plot_bottleneck_counts(bottlenecks)
+        plot_dora_metrics(dora_metrics)
+        plot_bottlenecks_by_stage_and_team(bottlenecks)
+        plot_avg_stage_durations(metrics)
+        plot_dora_trends_over_sprints(metrics)
+        plot_developer_stage_heatmap(bottlenecks)
 
     plot_stage_distribution(
-        metrics, "pr_review_time", save_path="pr_review_time.png"
+        metrics, "pr_review_time", save_path=os.path.join(output_dir, "pr_review_time.png")
     )
 
     plot_bottleneck_counts(
-        bottlenecks, os.path.join(OUTPUT_DIR, "bottleneck_counts.png")
+        bottlenecks, os.path.join(output_dir, "bottleneck_counts.png")
     )
     plot_dora_metrics(
-        dora_metrics, os.path.join(OUTPUT_DIR, "dora_metrics.png")
+        dora_metrics, os.path.join(output_dir, "dora_metrics.png")
     )
     plot_bottlenecks_by_stage_and_team(
-        bottlenecks, os.path.join(OUTPUT_DIR, "bottlenecks_by_stage_and_team.png")
+        bottlenecks, os.path.join(output_dir, "bottlenecks_by_stage_and_team.png")
     )
     plot_avg_stage_durations(
-        metrics, os.path.join(OUTPUT_DIR, "avg_pr_review_time_by_team.png")
+        metrics, os.path.join(output_dir, "avg_pr_review_time_by_team.png")
     )
     plot_dora_trends_over_sprints(
-        metrics, os.path.join(OUTPUT_DIR, "lead_time_trend.png")
+        metrics, os.path.join(output_dir, "lead_time_trend.png")
     )
     plot_developer_stage_heatmap(
-        bottlenecks, os.path.join(OUTPUT_DIR, "developer_stage_heatmap.png")
+        bottlenecks, os.path.join(output_dir, "developer_stage_heatmap.png")
+    )
+
+    print(f"✅ Done. Check the '{output_dir}/' folder for results.")
+    print("\n📈 DORA Metrics Summary:")
+    for k, v in dora_metrics.items():
+        print(f"   {k}: {v}")
+
+
+def run_incremental(
+    tasks: List[DevOpsTask],
+    state: PipelineState,
+    state_path: str,
+    warehouse_path: Optional[str] = None,
+    output_dir: str = OUTPUT_DIR
+):
+    """
+    Ingest only tasks past the stored watermark, score them with the
+    stored detectors and patch the outputs in place. History is never
+    reloaded, so the cost of a run follows the number of new tasks.
+    Plots and fitted thresholds are refreshed by a full run.
+    """
+    new_tasks = select_new_tasks(tasks, state)
+    if not new_tasks:
+        print(f"[INFO] No new tasks since {state.watermark}.")
+        save_state(state, state_path)  # Keeps the advanced source offset
+        return
+
+    print(f"📥 Ingesting {len(new_tasks)} new tasks...")
+    metrics = compute_all_metrics(new_tasks)
+    bottlenecks = detect_bottlenecks(metrics, state.bottleneck_detector)
+    task_ids_with_bottlenecks = {b["ticket_id"] for b in bottlenecks}
+    task_recs = generate_compact_recommendations(
+        [m for m in metrics if m.ticket_id in task_ids_with_bottlenecks]
     )
+    anomalies = detect_anomalies(metrics, state.anomaly_model)
+
+    print("🔁 Updating DORA, trends and bottleneck state...")
+    update_state(state, new_tasks, metrics, bottlenecks, task_recs)
+    dora_metrics = dora_from_state(state.dora)
+    dora_recs = generate_dora_recommendations(dora_metrics)
+    trends = trends_from_state(state.trends)
+
+    print("📤 Patching outputs...")
+    export_metrics_to_csv(metrics, os.path.join(output_dir, "metrics.csv"), append=True)
+    append_json(bottlenecks, os.path.join(output_dir, "bottlenecks.json"))
+    append_json(task_recs["tasks"], os.path.join(output_dir, "task_recommendations.json"), depth=2)
+    append_json(anomalies, os.path.join(output_dir, "anomalies.json"))
+    export_summaries(state, dora_metrics, dora_recs, trends, output_dir)
+
+    with open(os.path.join(output_dir, "task_recommendations.txt"), "a") as f:
+        write_task_recommendation_lines(f, task_recs["tasks"])
+
+    if warehouse_path:
+        with closing(connect(warehouse_path)) as conn:
+            store_run(conn, new_tasks, metrics, bottlenecks, anomalies, dora_metrics, full=False)
+
+    save_state(state, state_path)
 
-    print("✅ Done. Check the 'outputs/' folder for results.")
+    print(f"✅ Done. {state.task_count} tasks analyzed so far, watermark {state.watermark}.")
     print("\n📈 DORA Metrics Summary:")
     for k, v in dora_metrics.items():
         print(f"   {k}: {v}")
 
+
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser(description="DevOptiX DevOps production analyzer")
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="only process tasks deployed after the last run's watermark"
+    )
+    parser.add_argument(
+        "--tasks-csv", metavar="CSV_PATH",
+        help="read tasks from a CSV export instead of generating synthetic data"
+    )
+    parser.add_argument(
+        "--warehouse", metavar="DB_PATH",
+        help="also store tasks, metrics and results in this SQLite database"
+    )
+    args = parser.parse_args()
+    if args.incremental and not args.tasks_csv:
+        parser.error("--incremental needs a real task source: pass --tasks-csv")
+
+    run(incremental=args.incremental, warehouse_path=args.warehouse, tasks_csv=args.tasks_csv)
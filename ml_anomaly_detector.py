@@ -1,23 +1,42 @@
 from sklearn.ensemble import IsolationForest
 from compute_metrics import DevOpsMetrics
-from typing import List, Dict
+from typing import List, Dict, Optional
 
-def detect_anomalies(metrics: List[DevOpsMetrics]) -> List[Dict]:
+def _anomaly_features(m: DevOpsMetrics) -> List[float]:
+    return [
+        m.pr_review_time.total_seconds(),
+        m.cycle_time.total_seconds(),
+        m.lead_time.total_seconds(),
+        m.build_time.total_seconds(),
+    ]
+
+
+def fit_anomaly_model(metrics: List[DevOpsMetrics]) -> Optional[IsolationForest]:
+    data = []
+    for m in metrics:
+        try:
+            data.append(_anomaly_features(m))
+        except AttributeError:
+            continue
+
+    if not data:
+        return None
+
+    return IsolationForest(contamination=0.1, random_state=42).fit(data)
+
+
+def detect_anomalies(metrics: List[DevOpsMetrics], model: Optional[IsolationForest] = None) -> List[Dict]:
     """
     Use Isolation Forest to detect anomalous task metrics.
     Flags tasks with behavior deviating significantly from the norm.
+    A previously fitted model can be passed to score new tasks only.
     """
     data = []
     meta = []
 
     for m in metrics:
         try:
-            data.append([
-                m.pr_review_time.total_seconds(),
-                m.cycle_time.total_seconds(),
-                m.lead_time.total_seconds(),
-                m.build_time.total_seconds(),
-            ])
+            data.append(_anomaly_features(m))
             meta.append({
                 "ticket_id": m.ticket_id,
                 "developer": m.developer,
@@ -33,8 +52,11 @@ def detect_anomalies(metrics: List[DevOpsMetrics]) -> List[Dict]:
     if not data:
         return []
 
-    model = IsolationForest(contamination=0.1, random_state=42)
-    predictions = model.fit_predict(data)
+    if model is None:
+        model = IsolationForest(contamination=0.1, random_state=42)
+        predictions = model.fit_predict(data)
+    else:
+        predictions = model.predict(data)
 
     anomalies = []
     for i, label in enumerate(predictions):
@@ -0,0 +1,158 @@
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from models import DevOpsTask
+from identifiers import IDENTIFIERS
+
+# Multi-tenant batch runner: many organizations, one warm process or worker pool
+
+TENANT_OUTPUT_DIR = os.path.join("outputs", "tenants")
+Loader = Callable[[], List[DevOpsTask]]
+# A task list, a loader, or a (loader, expected task count) pair
+TaskSource = Union[List[DevOpsTask], Loader, Tuple[Loader, int]]
+
+
+def _warm_worker() -> None:
+    # Pool initializer: pay matplotlib / sklearn / pandas imports once per worker.
+    # Workers are spawned, not forked, so numpy is not loaded yet and the thread limits apply.
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+    import matplotlib
+    matplotlib.use("Agg")
+    import main  # noqa: F401
+
+
+def _source_size(source: TaskSource) -> float:
+    if isinstance(source, tuple):
+        return source[1]
+    # Loaders without a size hint are scheduled first, like the largest tenants
+    return len(source) if hasattr(source, "__len__") else float("inf")
+
+
+def _load_source(source: TaskSource) -> List[DevOpsTask]:
+    if isinstance(source, tuple):
+        source = source[0]
+    return source() if callable(source) else source
+
+
+def schedule_tenants(sources: Dict[str, TaskSource]) -> List[str]:
+    """
+    Longest-processing-time-first order: big tenants start early so the pool
+    is not left waiting on one large tenant at the end.
+    """
+    return sorted(sources, key=lambda name: _source_size(sources[name]), reverse=True)
+
+
+def run_tenant(
+    tenant: str,
+    source: TaskSource,
+    base_dir: str = TENANT_OUTPUT_DIR,
+    incremental: bool = False,
+    warehouse: bool = False
+) -> Dict:
+    """
+    Run the full pipeline for one tenant in its own output directory.
+    Pipeline logs go to <tenant dir>/run.log instead of the shared stdout.
+    """
+    from main import run
+
+    if not tenant or os.path.basename(tenant) != tenant or tenant in (".", ".."):
+        raise ValueError(f"Invalid tenant name: {tenant!r}")
+
+    output_dir = os.path.join(base_dir, tenant)
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Drop the previous tenant's names so long-lived workers do not accumulate them
+    IDENTIFIERS.clear()
+
+    start = time.perf_counter()
+    tasks = _load_source(source)
+    with open(os.path.join(output_dir, "run.log"), "w") as log, redirect_stdout(log):
+        run(
+            tasks,
+            incremental=incremental,
+            warehouse_path=os.path.join(output_dir, "warehouse.db") if warehouse else None,
+            output_dir=output_dir,
+            show_plots=False
+        )
+
+    return {
+        "tenant": tenant,
+        "tasks": len(tasks),
+        "output_dir": output_dir,
+        "wall_time_seconds": round(time.perf_counter() - start, 3)
+    }
+
+
+def run_tenants(
+    sources: Dict[str, TaskSource],
+    base_dir: str = TENANT_OUTPUT_DIR,
+    workers: Optional[int] = None,
+    incremental: bool = False,
+    warehouse: bool = False
+) -> List[Dict]:
+    """
+    Analyze many tenants in one invocation.
+    workers=1 runs them back to back in this process, paying the imports once;
+    otherwise a process pool of warmed workers picks tenants in schedule order.
+    Give loaders a size hint, (loader, expected_tasks), so they can be scheduled.
+    Sources must be picklable (task lists or module-level loaders) for workers > 1,
+    and workers are spawned, so calling scripts need an `if __name__ == "__main__"` guard.
+    """
+    order = schedule_tenants(sources)
+    workers = workers or min(len(order), os.cpu_count() or 1)
+    job = partial(run_tenant, base_dir=base_dir, incremental=incremental, warehouse=warehouse)
+    results = []
+
+    def record(tenant: str, outcome: Callable[[], Dict]) -> None:
+        try:
+            results.append(outcome())
+            print(f"[TENANT] {tenant}: {results[-1]['wall_time_seconds']}s")
+        except Exception as exc:
+            print(f"[ERROR] Tenant '{tenant}' failed: {exc}")
+            results.append({"tenant": tenant, "error": str(exc)})
+
+    if workers <= 1:
+        for tenant in order:
+            record(tenant, partial(job, tenant, sources[tenant]))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_worker
+        ) as pool:
+            futures = {pool.submit(job, tenant, sources[tenant]): tenant for tenant in order}
+            for future in as_completed(futures):
+                record(futures[future], future.result)
+
+    return sorted(results, key=lambda r: order.index(r["tenant"]))
+
+
+if __name__ == "__main__":
+    from generate_data import generate_synthetic_tasks
+    from export import export_json
+
+    parser = argparse.ArgumentParser(description="Run DevOptiX for many tenants at once")
+    parser.add_argument("--tenants", type=int, default=8, help="number of synthetic tenants")
+    parser.add_argument("--tasks", type=int, default=100, help="tasks per synthetic tenant")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (1 = in-process)")
+    args = parser.parse_args()
+
+    sources = {}
+    for i in range(args.tenants):
+        size = args.tasks * (i % 3 + 1)
+        sources[f"org-{i + 1}"] = (partial(generate_synthetic_tasks, size), size)
+
+    start = time.perf_counter()
+    results = run_tenants(sources, workers=args.workers)
+    total = time.perf_counter() - start
+
+    export_json(results, os.path.join(TENANT_OUTPUT_DIR, "tenant_timings.json"))
+    print(f"\n⏱️ {len(results)} tenants in {total:.2f}s")
+    for r in results:
+        print(f"   {r['tenant']}: {r.get('wall_time_seconds', 'failed')}s, {r.get('tasks', 0)} tasks")
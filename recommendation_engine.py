@@ -1,4 +1,5 @@
-from typing import List, Dict
+from collections import defaultdict
+from typing import List, Dict, Optional
 from compute_metrics import DevOpsMetrics, compute_dora_metrics
 from models import DevOpsTask
 
@@ -11,61 +12,120 @@ DORA_THRESHOLDS = {
 }
 
 
-def generate_task_recommendations(m: DevOpsMetrics) -> List[Dict]:
-    recs = []
+# Task rule catalog: each rule is stored once and referenced by ID
+TASK_RULES = {
+    "slow_pr_review": {
+        "field": "pr_review_time",
+        "threshold_seconds": 36 * 3600,
+        "category": "Code Review",
+        "severity": "High",
+        "message": "PR reviews are slow. Encourage smaller PRs, rotate reviewers, or enforce SLAs."
+    },
+    "high_lead_time": {
+        "field": "lead_time",
+        "threshold_seconds": 5 * 86400,
+        "category": "Process",
+        "severity": "High",
+        "message": "Lead time is too high. Reassess delays across planning to delivery."
+    },
+    "deploy_lag": {
+        "field": "deploy_lag",
+        "threshold_seconds": 2 * 3600,
+        "category": "Deployment",
+        "severity": "Medium",
+        "message": "Deployments are delayed post-merge. Consider continuous delivery triggers."
+    },
+    "slow_build": {
+        "field": "build_time",
+        "threshold_seconds": 1800,
+        "category": "CI/CD",
+        "severity": "Medium",
+        "message": "Builds are slow. Optimize pipelines, cache dependencies, or parallelize tests."
+    },
+    "high_cycle_time": {
+        "field": "cycle_time",
+        "threshold_seconds": 4 * 86400,
+        "category": "Development",
+        "severity": "High",
+        "message": "Cycle time is high. Investigate blockers during development or QA delays."
+    }
+}
 
-    if m.pr_review_time.total_seconds() > 36 * 3600:
-        recs.append({
-            "category": "Code Review",
-            "severity": "High",
-            "message": "PR reviews are slow. Encourage smaller PRs, rotate reviewers, or enforce SLAs."
-        })
 
-    if m.lead_time.total_seconds() > 5 * 86400:
-        recs.append({
-            "category": "Process",
-            "severity": "High",
-            "message": "Lead time is too high. Reassess delays across planning to delivery."
-        })
+# Rule fields shown in recommendations
+RULE_FIELDS = ("category", "severity", "message")
 
-    if m.deploy_lag.total_seconds() > 2 * 3600:
-        recs.append({
-            "category": "Deployment",
-            "severity": "Medium",
-            "message": "Deployments are delayed post-merge. Consider continuous delivery triggers."
-        })
 
-    if m.build_time.total_seconds() > 1800:
-        recs.append({
-            "category": "CI/CD",
-            "severity": "Medium",
-            "message": "Builds are slow. Optimize pipelines, cache dependencies, or parallelize tests."
-        })
+def rule_catalog() -> Dict[str, Dict]:
+    return {
+        rule_id: {k: rule[k] for k in RULE_FIELDS}
+        for rule_id, rule in TASK_RULES.items()
+    }
 
-    if m.cycle_time.total_seconds() > 4 * 86400:
-        recs.append({
-            "category": "Development",
-            "severity": "High",
-            "message": "Cycle time is high. Investigate blockers during development or QA delays."
-        })
 
-    return recs
+def match_task_rules(m: DevOpsMetrics) -> List[str]:
+    return [
+        rule_id for rule_id, rule in TASK_RULES.items()
+        if getattr(m, rule["field"]).total_seconds() > rule["threshold_seconds"]
+    ]
+
+
+def generate_task_recommendations(m: DevOpsMetrics) -> List[Dict]:
+    return [{k: TASK_RULES[rule_id][k] for k in RULE_FIELDS} for rule_id in match_task_rules(m)]
 
 
 def generate_all_recommendations(metrics_list: List[DevOpsMetrics]) -> List[Dict]:
-    all_recs = []
+    return expand_recommendations(generate_compact_recommendations(metrics_list))
+
 
+def generate_compact_recommendations(metrics_list: List[DevOpsMetrics]) -> Dict:
+    """
+    Rule-ID form of the task recommendations.
+    Messages live once in the shared catalog; each task only lists rule IDs.
+    """
+    tasks = []
     for m in metrics_list:
-        task_recs = generate_task_recommendations(m)
-        if task_recs:
-            all_recs.append({
+        rule_ids = match_task_rules(m)
+        if rule_ids:
+            tasks.append({
                 "ticket_id": m.ticket_id,
                 "developer": m.developer,
                 "team": m.team,
-                "recommendations": task_recs
+                "rules": rule_ids
             })
 
-    return all_recs
+    return {"rules": rule_catalog(), "tasks": tasks}
+
+
+def expand_recommendations(compact: Dict) -> List[Dict]:
+    catalog = compact["rules"]
+    return [
+        {
+            "ticket_id": t["ticket_id"],
+            "developer": t["developer"],
+            "team": t["team"],
+            "recommendations": [dict(catalog[rule_id]) for rule_id in t["rules"]]
+        }
+        for t in compact["tasks"]
+    ]
+
+
+def summarize_recommendations(compact: Dict, group_by: Optional[str] = "team") -> Dict:
+    """
+    Count rule hits, either per rule or per rule x group_by ("team" / "developer").
+    """
+    if group_by is None:
+        counts = defaultdict(int)
+        for t in compact["tasks"]:
+            for rule_id in t["rules"]:
+                counts[rule_id] += 1
+        return dict(counts)
+
+    counts = defaultdict(lambda: defaultdict(int))
+    for t in compact["tasks"]:
+        for rule_id in t["rules"]:
+            counts[rule_id][t[group_by]] += 1
+    return {rule_id: dict(groups) for rule_id, groups in counts.items()}
 
 
 def generate_dora_recommendations(dora: Dict) -> List[Dict]:
@@ -1,8 +1,22 @@
 from collections import defaultdict
 from statistics import mean
-from typing import List
+from typing import List, Dict
 from compute_metrics import DevOpsMetrics
 
+TREND_FIELDS = ["pr_review_time", "cycle_time", "lead_time"]
+
+
+def _regression_warning(dev: str, metric_name: str, sprint, past_avg: float, current: float) -> Dict:
+    return {
+        "developer": dev,
+        "metric": metric_name,
+        "sprint": sprint,
+        "previous_avg": round(past_avg, 2),
+        "current": round(current, 2),
+        "message": f"{metric_name} increased by over 20% in sprint {sprint}"
+    }
+
+
 def analyze_trends(metrics: List[DevOpsMetrics]):
     """
     Analyze per-developer metric trends over sprints.
@@ -13,9 +27,8 @@ def analyze_trends(metrics: List[DevOpsMetrics]):
     for m in metrics:
         if not hasattr(m, "sprint"):
             continue  # Skip if sprint info is missing
-        trends_by_dev[m.developer]["pr_review_time"].append((m.sprint, m.pr_review_time.total_seconds()))
-        trends_by_dev[m.developer]["cycle_time"].append((m.sprint, m.cycle_time.total_seconds()))
-        trends_by_dev[m.developer]["lead_time"].append((m.sprint, m.lead_time.total_seconds()))
+        for field in TREND_FIELDS:
+            trends_by_dev[m.developer][field].append((m.sprint, getattr(m, field).total_seconds()))
 
     regression_warnings = []
 
@@ -29,13 +42,43 @@ def analyze_trends(metrics: List[DevOpsMetrics]):
                 if past_avg == 0:
                     continue
                 if durations[-1] > 1.2 * past_avg:
-                    regression_warnings.append({
-                        "developer": dev,
-                        "metric": metric_name,
-                        "sprint": sprints[-1],
-                        "previous_avg": round(past_avg, 2),
-                        "current": round(durations[-1], 2),
-                        "message": f"{metric_name} increased by over 20% in sprint {sprints[-1]}"
-                    })
+                    regression_warnings.append(
+                        _regression_warning(dev, metric_name, sprints[-1], past_avg, durations[-1])
+                    )
+
+    return regression_warnings
+
+
+def update_trend_state(state: Dict, metrics: List[DevOpsMetrics]) -> Dict:
+    """
+    Keep [count, sum, latest (sprint, duration)] per developer and metric,
+    which is all analyze_trends needs to judge the latest sprint.
+    """
+    for m in metrics:
+        if not hasattr(m, "sprint"):
+            continue
+        dev_state = state.setdefault(m.developer, {})
+        for field in TREND_FIELDS:
+            point = (m.sprint, getattr(m, field).total_seconds())
+            stats = dev_state.setdefault(field, [0, 0.0, point])
+            stats[0] += 1
+            stats[1] += point[1]
+            stats[2] = max(stats[2], point)
+    return state
+
+
+def trends_from_state(state: Dict) -> List[Dict]:
+    regression_warnings = []
+
+    for dev, metric_data in state.items():
+        for metric_name, (count, total, (sprint, current)) in metric_data.items():
+            if count >= 3:
+                past_avg = (total - current) / (count - 1)
+                if past_avg == 0:
+                    continue
+                if current > 1.2 * past_avg:
+                    regression_warnings.append(
+                        _regression_warning(dev, metric_name, sprint, past_avg, current)
+                    )
 
     return regression_warnings
@@ -1,23 +1,84 @@
 import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd
+import numpy as np
 from collections import Counter, defaultdict
-from typing import List, Optional
+from typing import Iterable, List, Optional, Tuple
 from compute_metrics import DevOpsMetrics
 
 sns.set(style="whitegrid")
 
-
-def plot_stage_distribution(metrics: List[DevOpsMetrics], field: str, save_path: Optional[str] = None):
+# Above this many tasks, distributions are drawn from precomputed bins
+AGGREGATE_THRESHOLD = 50_000
+MAX_BINS = 200
+KDE_GRID_POINTS = 200
+KDE_BINS = 1024
+
+
+def histogram_bins(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Count values into bins sized like numpy's "auto" rule, capped at
+    MAX_BINS so the rendering cost stays bounded.
+    """
+    n = len(values)
+    q75, q25 = np.percentile(values, [75, 25])
+    span = values.max() - values.min()
+    n_bins = int(np.log2(n)) + 1
+    if q75 > q25 and span > 0:
+        n_bins = max(n_bins, int(np.ceil(span / (2 * (q75 - q25) * n ** (-1 / 3)))))
+    return np.histogram(values, bins=min(n_bins, MAX_BINS))
+
+
+def binned_kde(values: np.ndarray, bin_width: float, grid_points: int = KDE_GRID_POINTS):
+    """
+    Gaussian KDE (Scott's bandwidth) over a fine histogram of the values,
+    scaled to tasks per display bin like seaborn's histplot(kde=True).
+    Cost depends on the grid size, not on the number of values.
+    """
+    counts, edges = np.histogram(values, bins=KDE_BINS)
+    centers = (edges[:-1] + edges[1:]) / 2
+    n = counts.sum()
+    grid = np.linspace(edges[0], edges[-1], grid_points)
+    std = np.sqrt(np.average((centers - np.average(centers, weights=counts)) ** 2, weights=counts))
+    if n < 2 or std == 0:
+        return grid, np.zeros_like(grid)
+
+    bandwidth = std * n ** (-1 / 5)
+    z = (grid[:, None] - centers[None, :]) / bandwidth
+    density = (counts[None, :] * np.exp(-0.5 * z ** 2)).sum(axis=1) / (n * bandwidth * np.sqrt(2 * np.pi))
+    return grid, density * n * bin_width
+
+
+def plot_stage_distribution(
+    metrics: List[DevOpsMetrics],
+    field: str,
+    save_path: Optional[str] = None,
+    aggregate: Optional[bool] = None
+):
     try:
-        durations = [getattr(m, field).total_seconds() / 3600 for m in metrics]
+        durations = np.fromiter(
+            (getattr(m, field).total_seconds() / 3600 for m in metrics),
+            dtype=float, count=len(metrics)
+        )
     except AttributeError:
         print(f"[ERROR] Field '{field}' not found in DevOpsMetrics.")
         return
 
+    if aggregate is None:
+        aggregate = len(durations) > AGGREGATE_THRESHOLD
+
     plt.figure(figsize=(10, 6))
-    sns.histplot(durations, kde=True, color="skyblue")
-    
+    if aggregate and len(durations):
+        counts, edges = histogram_bins(durations)
+        binned = pd.DataFrame({"hours": (edges[:-1] + edges[1:]) / 2, "tasks": counts})
+        sns.histplot(
+            data=binned, x="hours", weights="tasks",
+            bins=len(counts), binrange=(edges[0], edges[-1]), color="skyblue"
+        )
+        plt.plot(*binned_kde(durations, edges[1] - edges[0]), color="skyblue")
+    else:
+        sns.histplot(durations, kde=True, color="skyblue")
+
     plt.title(f"Distribution of {field.replace('_', ' ').title()} (Hours)")
     plt.xlabel("Hours")
     plt.ylabel("Number of Tasks")
@@ -31,8 +92,7 @@ def plot_stage_distribution(metrics: List[DevOpsMetrics], field: str, save_path:
 
 
 def plot_bottleneck_counts(bottlenecks: List[dict], save_path: Optional[str] = None):
-    all_stages = [stage for b in bottlenecks for stage in b.get("bottlenecks", [])]
-    counts = Counter(all_stages)
+    counts = Counter(stage for b in bottlenecks for stage in b.get("bottlenecks", []))
 
     if not counts:
         print("[INFO] No bottlenecks to plot.")
@@ -77,18 +137,19 @@ def plot_dora_metrics(dora: dict, save_path: Optional[str] = None):
 
 
 def plot_bottlenecks_by_stage_and_team(bottlenecks: List[dict], save_path: Optional[str] = None):
-    records = []
-    for b in bottlenecks:
-        team = b.get("team")
-        for stage in b.get("bottlenecks", []):
-            records.append({"stage": stage, "team": team})
-    if not records:
+    counts = Counter(
+        (stage, b.get("team")) for b in bottlenecks for stage in b.get("bottlenecks", [])
+    )
+    if not counts:
         print("[INFO] No data to plot for bottlenecks by stage and team.")
         return
 
-    df = pd.DataFrame(records)
+    df = pd.DataFrame(
+        [(stage, team, count) for (stage, team), count in counts.items()],
+        columns=["stage", "team", "count"]
+    )
     plt.figure(figsize=(10, 6))
-    sns.countplot(data=df, x="stage", hue="team", palette="Set2")
+    sns.barplot(data=df, x="stage", y="count", hue="team", palette="Set2")
     plt.title("Bottlenecks by Stage and Team")
     plt.xlabel("Pipeline Stage")
     plt.ylabel("Count")
@@ -103,10 +164,20 @@ def plot_bottlenecks_by_stage_and_team(bottlenecks: List[dict], save_path: Optio
     plt.close()
 
 
+def _group_means(pairs: Iterable[Tuple]) -> pd.Series:
+    # Running sums per key instead of a DataFrame holding every task
+    sums = defaultdict(float)
+    counts = defaultdict(int)
+    for key, value in pairs:
+        sums[key] += value
+        counts[key] += 1
+    return pd.Series({key: sums[key] / counts[key] for key in sums}, dtype=float)
+
+
 def plot_avg_stage_durations(metrics: List[DevOpsMetrics], save_path: Optional[str] = None):
-    df = pd.DataFrame([m.__dict__ for m in metrics])
-    df['pr_review_time_hrs'] = df['pr_review_time'].dt.total_seconds() / 3600
-    avg = df.groupby("team")['pr_review_time_hrs'].mean().sort_values()
+    avg = _group_means(
+        (m.team, m.pr_review_time.total_seconds() / 3600) for m in metrics
+    ).sort_values()
 
     plt.figure(figsize=(10, 6))
     avg.plot(kind='barh', color='coral')
@@ -123,15 +194,15 @@ def plot_avg_stage_durations(metrics: List[DevOpsMetrics], save_path: Optional[s
 
 
 def plot_dora_trends_over_sprints(metrics: List[DevOpsMetrics], save_path: Optional[str] = None):
-    df = pd.DataFrame([m.__dict__ for m in metrics])
-    df['lead_time_hours'] = (df['deployed_at'] - df['first_commit_at']).dt.total_seconds() / 3600
+    sprint_means = _group_means(
+        (m.sprint, (m.deployed_at - m.first_commit_at).total_seconds() / 3600)
+        for m in metrics if m.sprint is not None
+    ).sort_index()
 
-    if 'sprint' not in df.columns:
+    if sprint_means.empty:
         print("[WARN] Sprint field missing. Cannot plot DORA trends.")
         return
 
-    sprint_means = df.groupby("sprint")["lead_time_hours"].mean()
-
     plt.figure(figsize=(10, 5))
     sprint_means.plot(marker='o', linestyle='-', color='blue')
     plt.title("Lead Time per Sprint")
@@ -149,17 +220,14 @@ def plot_dora_trends_over_sprints(metrics: List[DevOpsMetrics], save_path: Optio
 
 
 def plot_developer_stage_heatmap(bottlenecks: List[dict], save_path: Optional[str] = None):
-    records = []
-    for b in bottlenecks:
-        dev = b.get("developer")
-        for stage in b.get("bottlenecks", []):
-            records.append({"developer": dev, "stage": stage})
-    if not records:
+    counts = Counter(
+        (b.get("developer"), stage) for b in bottlenecks for stage in b.get("bottlenecks", [])
+    )
+    if not counts:
         print("[INFO] No developer bottlenecks to plot.")
         return
 
-    df = pd.DataFrame(records)
-    heatmap_data = df.groupby(['developer', 'stage']).size().unstack(fill_value=0)
+    heatmap_data = pd.Series(counts).rename_axis(['developer', 'stage']).sort_index().unstack(fill_value=0)
 
     plt.figure(figsize=(10, 6))
     sns.heatmap(heatmap_data, annot=True, fmt='d', cmap="YlGnBu")
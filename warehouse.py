@@ -0,0 +1,360 @@
+import sqlite3
+from contextlib import nullcontext
+from dataclasses import fields
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+from models import DevOpsTask
+from compute_metrics import DevOpsMetrics
+from identifiers import IDENTIFIERS
+
+# Embedded SQLite store for tasks, metrics and analysis results
+
+DURATION_FIELDS = [f.name for f in fields(DevOpsMetrics) if f.type is timedelta]
+GROUP_COLUMNS = {"team", "developer", "sprint"}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS tasks (
+    ticket_id TEXT PRIMARY KEY,
+    developer TEXT NOT NULL,
+    team TEXT NOT NULL,
+    sprint INTEGER,
+    created_at TEXT,
+    in_progress_at TEXT,
+    first_commit_at TEXT,
+    pr_created_at TEXT,
+    pr_merged_at TEXT,
+    build_started_at TEXT,
+    deployed_at TEXT NOT NULL,
+    deployment_success INTEGER NOT NULL,
+    restore_time TEXT,
+    pr_lines_changed INTEGER,
+    test_passed INTEGER,
+    deployment_successful INTEGER,
+    incident_reported INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_deployed_at ON tasks (deployed_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_team ON tasks (team);
+CREATE INDEX IF NOT EXISTS idx_tasks_developer ON tasks (developer);
+CREATE INDEX IF NOT EXISTS idx_tasks_sprint ON tasks (sprint);
+
+CREATE TABLE IF NOT EXISTS metrics (
+    ticket_id TEXT PRIMARY KEY REFERENCES tasks (ticket_id),
+    {", ".join(f"{field} REAL NOT NULL" for field in DURATION_FIELDS)}
+);
+
+CREATE TABLE IF NOT EXISTS bottlenecks (
+    ticket_id TEXT NOT NULL REFERENCES tasks (ticket_id),
+    stage TEXT NOT NULL,
+    heuristic INTEGER NOT NULL,
+    ml_flag INTEGER NOT NULL,
+    PRIMARY KEY (ticket_id, stage)
+);
+CREATE INDEX IF NOT EXISTS idx_bottlenecks_stage ON bottlenecks (stage);
+
+CREATE TABLE IF NOT EXISTS anomalies (
+    ticket_id TEXT PRIMARY KEY REFERENCES tasks (ticket_id),
+    issue TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS dora_snapshots (
+    taken_at TEXT PRIMARY KEY,
+    deployment_frequency_per_day REAL,
+    average_lead_time_hours REAL,
+    change_failure_rate_percent REAL,
+    mean_time_to_restore_hours REAL
+);
+"""
+
+TASK_COLUMNS = [
+    'ticket_id', 'developer', 'team', 'sprint', 'created_at', 'in_progress_at',
+    'first_commit_at', 'pr_created_at', 'pr_merged_at', 'build_started_at',
+    'deployed_at', 'deployment_success', 'restore_time', 'pr_lines_changed',
+    'test_passed', 'deployment_successful', 'incident_reported',
+]
+
+
+def connect(path: str = "devoptix.db") -> sqlite3.Connection:
+    """
+    Open (or create) the warehouse in WAL mode so readers never block the writer.
+    """
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _ts(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat(sep=" ") if value is not None else None
+
+
+def _chunks(rows: Iterator, batch_size: int) -> Iterator[List]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _transaction(conn: sqlite3.Connection, commit: bool):
+    # commit=False leaves the open transaction to the caller (see store_run)
+    return conn if commit else nullcontext()
+
+
+def _insert_many(conn: sqlite3.Connection, sql: str, rows: Iterator, batch_size: int) -> int:
+    count = 0
+    for batch in _chunks(rows, batch_size):
+        conn.executemany(sql, batch)
+        count += len(batch)
+    return count
+
+
+def store_tasks(
+    conn: sqlite3.Connection,
+    tasks: List[DevOpsTask],
+    batch_size: int = 10_000,
+    commit: bool = True
+) -> int:
+    rows = (
+        tuple(
+            _ts(value) if isinstance(value, datetime) else value
+            for value in (getattr(t, column) for column in TASK_COLUMNS)
+        )
+        for t in tasks
+    )
+    placeholders = ", ".join("?" for _ in TASK_COLUMNS)
+    with _transaction(conn, commit):
+        return _insert_many(
+            conn,
+            f"INSERT OR REPLACE INTO tasks ({', '.join(TASK_COLUMNS)}) VALUES ({placeholders})",
+            rows, batch_size
+        )
+
+
+def store_metrics(
+    conn: sqlite3.Connection,
+    metrics: List[DevOpsMetrics],
+    batch_size: int = 10_000,
+    commit: bool = True
+) -> int:
+    rows = (
+        (m.ticket_id, *(getattr(m, field).total_seconds() for field in DURATION_FIELDS))
+        for m in metrics
+    )
+    placeholders = ", ".join("?" for _ in range(len(DURATION_FIELDS) + 1))
+    with _transaction(conn, commit):
+        return _insert_many(
+            conn,
+            f"INSERT OR REPLACE INTO metrics (ticket_id, {', '.join(DURATION_FIELDS)}) VALUES ({placeholders})",
+            rows, batch_size
+        )
+
+
+def store_bottlenecks(
+    conn: sqlite3.Connection,
+    bottlenecks: List[Dict],
+    batch_size: int = 10_000,
+    commit: bool = True
+) -> int:
+    rows = (
+        (b['ticket_id'], stage, int(b['heuristic']), int(b['ml_flag']))
+        for b in bottlenecks for stage in b['bottlenecks']
+    )
+    with _transaction(conn, commit):
+        # Replace any earlier flags for these tickets so re-scoring never leaves stale stages
+        _insert_many(
+            conn, "DELETE FROM bottlenecks WHERE ticket_id = ?",
+            ((b['ticket_id'],) for b in bottlenecks), batch_size
+        )
+        return _insert_many(
+            conn,
+            "INSERT INTO bottlenecks (ticket_id, stage, heuristic, ml_flag) VALUES (?, ?, ?, ?)",
+            rows, batch_size
+        )
+
+
+def store_anomalies(
+    conn: sqlite3.Connection,
+    anomalies: List[Dict],
+    batch_size: int = 10_000,
+    commit: bool = True
+) -> int:
+    with _transaction(conn, commit):
+        return _insert_many(
+            conn,
+            "INSERT OR REPLACE INTO anomalies (ticket_id, issue) VALUES (?, ?)",
+            ((a['ticket_id'], a['issue']) for a in anomalies), batch_size
+        )
+
+
+def store_dora_snapshot(
+    conn: sqlite3.Connection,
+    dora: Dict,
+    taken_at: Optional[datetime] = None,
+    commit: bool = True
+) -> None:
+    if not dora:
+        return
+    with _transaction(conn, commit):
+        conn.execute(
+            "INSERT OR REPLACE INTO dora_snapshots VALUES (?, ?, ?, ?, ?)",
+            (
+                _ts(taken_at or datetime.now()),
+                dora["deployment_frequency_per_day"],
+                dora["average_lead_time_hours"],
+                dora["change_failure_rate_percent"],
+                dora["mean_time_to_restore_hours"],
+            )
+        )
+
+
+def clear_results(conn: sqlite3.Connection, commit: bool = True) -> None:
+    # A full run re-scores all history, so earlier flags are dropped first
+    with _transaction(conn, commit):
+        conn.execute("DELETE FROM bottlenecks")
+        conn.execute("DELETE FROM anomalies")
+
+
+# ----------------------------
+# Query helpers (aggregation runs inside SQLite)
+# ----------------------------
+def _filters(since: Optional[datetime], until: Optional[datetime], team: Optional[str]):
+    clauses, params = [], []
+    if since is not None:
+        clauses.append("t.deployed_at >= ?")
+        params.append(_ts(since))
+    if until is not None:
+        clauses.append("t.deployed_at < ?")
+        params.append(_ts(until))
+    if team is not None:
+        clauses.append("t.team = ?")
+        params.append(team)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+
+def query_dora_metrics(
+    conn: sqlite3.Connection,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    team: Optional[str] = None
+) -> Dict:
+    """
+    Same figures as compute_dora_metrics, computed over the stored tasks.
+    """
+    where, params = _filters(since, until, team)
+    row = conn.execute(f"""
+        SELECT
+            COUNT(*),
+            COUNT(DISTINCT date(t.deployed_at)),
+            AVG((julianday(t.deployed_at) - julianday(t.first_commit_at)) * 24),
+            SUM(CASE WHEN t.deployment_success THEN 0 ELSE 1 END),
+            AVG(CASE WHEN NOT t.deployment_success AND t.restore_time IS NOT NULL
+                THEN (julianday(t.restore_time) - julianday(t.deployed_at)) * 24 END)
+        FROM tasks t {where}
+    """, params).fetchone()
+
+    count, unique_days, avg_lead_time_hrs, failed, mttr = row
+    if not count:
+        return {}
+
+    return {
+        "deployment_frequency_per_day": round(count / unique_days if unique_days else 0, 2),
+        "average_lead_time_hours": round(avg_lead_time_hrs, 2),
+        "change_failure_rate_percent": round(failed / count * 100, 2),
+        "mean_time_to_restore_hours": round(mttr or 0, 2)
+    }
+
+
+def query_bottleneck_counts(conn: sqlite3.Connection) -> Dict:
+    """
+    Same shape as aggregate_bottlenecks: one count per flagged stage.
+    """
+    def grouped(column: str) -> Dict:
+        return dict(conn.execute(f"""
+            SELECT {column}, COUNT(*) FROM bottlenecks b
+            JOIN tasks t ON t.ticket_id = b.ticket_id
+            GROUP BY {column}
+        """))
+
+    return {
+        'by_team': grouped("t.team"),
+        'by_developer': grouped("t.developer"),
+        'by_stage': grouped("b.stage")
+    }
+
+
+def query_stage_averages(
+    conn: sqlite3.Connection,
+    field: str = "pr_review_time",
+    group_by: str = "team",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> Dict:
+    """
+    Average of a duration field in hours per team, developer or sprint.
+    """
+    if field not in DURATION_FIELDS or group_by not in GROUP_COLUMNS:
+        raise ValueError(f"Unsupported field/group_by: {field}/{group_by}")
+
+    where, params = _filters(since, until, None)
+    return dict(conn.execute(f"""
+        SELECT t.{group_by}, AVG(m.{field}) / 3600 FROM metrics m
+        JOIN tasks t ON t.ticket_id = m.ticket_id
+        {where}
+        GROUP BY t.{group_by}
+        ORDER BY t.{group_by}
+    """, params))
+
+
+def iter_metrics(conn: sqlite3.Connection, batch_size: int = 10_000) -> Iterator[DevOpsMetrics]:
+    """
+    Stream stored metrics in deployment order without loading them all at once.
+    """
+    cursor = conn.execute(f"""
+        SELECT t.ticket_id, t.developer, t.team, t.sprint, t.first_commit_at, t.deployed_at,
+               {", ".join(f"m.{field}" for field in DURATION_FIELDS)}
+        FROM metrics m JOIN tasks t ON t.ticket_id = m.ticket_id
+        ORDER BY t.deployed_at
+    """)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        for ticket_id, developer, team, sprint, first_commit_at, deployed_at, *durations in rows:
+            yield DevOpsMetrics(
+                ticket_id=ticket_id,
+                developer=IDENTIFIERS.intern(developer),
+                team=IDENTIFIERS.intern(team),
+                sprint=sprint,
+                first_commit_at=datetime.fromisoformat(first_commit_at),
+                deployed_at=datetime.fromisoformat(deployed_at),
+                **{field: timedelta(seconds=s) for field, s in zip(DURATION_FIELDS, durations)}
+            )
+
+
+def store_run(
+    conn: sqlite3.Connection,
+    tasks: List[DevOpsTask],
+    metrics: List[DevOpsMetrics],
+    bottlenecks: List[Dict],
+    anomalies: List[Dict],
+    dora: Dict,
+    full: bool = True
+) -> None:
+    """
+    Persist one pipeline run in a single transaction, so a failure part-way
+    keeps the previous results intact. A full run replaces earlier bottleneck
+    and anomaly flags; an incremental run only adds its new batch.
+    """
+    with conn:
+        if full:
+            clear_results(conn, commit=False)
+        store_tasks(conn, tasks, commit=False)
+        store_metrics(conn, metrics, commit=False)
+        store_bottlenecks(conn, bottlenecks, commit=False)
+        store_anomalies(conn, anomalies, commit=False)
+        store_dora_snapshot(conn, dora, commit=False)